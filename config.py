@@ -39,6 +39,9 @@ RANK_EMOJIS = {
 # Goldbox emoji (emoji_32)
 GOLDBOX_EMOJI = '<:emoji_32:1395002503472484352>'
 
+# Logo shown in embed footers
+FOOTER_ICON_URL = 'https://ratings.ranked-rtanks.online/public/images/logo.png'
+
 # Leaderboard categories configuration
 LEADERBOARD_CATEGORIES = {
     'experience': {
@@ -84,7 +87,7 @@ SCRAPER_CONFIG = {
 # Cache configuration
 CACHE_CONFIG = {
     'player_cache_ttl': 300,  # 5 minutes
-    'leaderboard_cache_ttl': 900,  # 15 minutes
+    'leaderboard_cache_ttl': 3300,  # 55 minutes, just under the hourly post interval
     'translation_cache_ttl': 3600,  # 1 hour
     'max_cache_size': 1000
 }
@@ -1,12 +1,16 @@
 import discord
 from discord.ext import commands, tasks
 import asyncio
+import functools
+import hashlib
+import json
 import os
-from datetime import datetime
+import random
+import time
 import logging
 from scraper import RTanksPlayerScraper
 from translator import RTanksTranslator
-from config import RANK_EMOJIS, LEADERBOARD_CATEGORIES
+from config import RANK_EMOJIS, LEADERBOARD_CATEGORIES, CACHE_CONFIG, GOLDBOX_EMOJI, FOOTER_ICON_URL
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -15,7 +19,10 @@ logger = logging.getLogger(__name__)
 # Bot setup with required intents
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix='!', intents=intents)
+# Ratelimits longer than this raise discord.RateLimited instead of being slept out inside
+# the HTTP client, for every request the bot makes. The hourly task retries them and
+# interaction handlers tell the user to try again (see _send_ratelimited_notice)
+bot = commands.Bot(command_prefix='!', intents=intents, max_ratelimit_timeout=30.0)
 
 # Initialize scraper and translator
 scraper = RTanksPlayerScraper()
@@ -24,16 +31,54 @@ translator = RTanksTranslator()
 # Global variables for configuration
 LEADERBOARD_CHANNEL_ID = int(os.getenv('LEADERBOARD_CHANNEL_ID', '0'))
 
+# Leaderboard cache: category -> (fetched_at, data)
+LEADERBOARD_CACHE_TTL = CACHE_CONFIG['leaderboard_cache_ttl']
+_LB_CACHE: dict[str, tuple[float, list]] = {}
+_LB_LOCKS: dict[str, asyncio.Lock] = {}
+
+# Hash of each category's data as last posted by the hourly task
+_last_lb_hash: dict[str, str] = {}
+
+def _leaderboard_hash(leaderboard_data: list) -> str:
+    """Fingerprint leaderboard data so unchanged hourly posts can be skipped"""
+    payload = json.dumps(leaderboard_data, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+async def get_cached_leaderboard(category: str):
+    """Get leaderboard data for a category, scraping only when the cached copy is stale"""
+    entry = _LB_CACHE.get(category)
+    if entry and time.monotonic() - entry[0] < LEADERBOARD_CACHE_TTL:
+        return entry[1]
+
+    lock = _LB_LOCKS.setdefault(category, asyncio.Lock())
+    async with lock:
+        # Another caller may have refreshed the entry while we waited
+        entry = _LB_CACHE.get(category)
+        if entry and time.monotonic() - entry[0] < LEADERBOARD_CACHE_TTL:
+            return entry[1]
+
+        leaderboard_data = await scraper.get_leaderboard(category)
+        if leaderboard_data:
+            _LB_CACHE[category] = (time.monotonic(), leaderboard_data)
+        return leaderboard_data
+
 @bot.event
 async def on_ready():
     logger.info(f'{bot.user} has connected to Discord!')
     logger.info(f'Bot ID: {bot.user.id}')
     logger.info(f'Bot is in {len(bot.guilds)} guilds')
     
-    # Wait a moment before syncing
-    await asyncio.sleep(1)
+    # List current commands in tree
+    logger.info(f"Commands in tree: {[cmd.name for cmd in bot.tree.get_commands()]}")
     
-    # Sync slash commands globally
+    # Start hourly leaderboard task
+    if not hourly_leaderboard.is_running():
+        hourly_leaderboard.start()
+
+@bot.command()
+@commands.is_owner()
+async def sync(ctx: commands.Context):
+    """Owner-only command to register slash commands globally (run after deploying changes)"""
     try:
         logger.info("Starting command sync...")
         # Add timeout to prevent hanging
@@ -41,81 +86,108 @@ async def on_ready():
         logger.info(f"Successfully synced {len(synced)} global command(s)")
         for cmd in synced:
             logger.info(f"Synced command: {cmd.name} - {cmd.description}")
+        await ctx.send(f"✅ Synced {len(synced)} global command(s): {', '.join(cmd.name for cmd in synced)}")
     except asyncio.TimeoutError:
         logger.error("Command sync timed out - this usually means the bot lacks 'applications.commands' scope")
         logger.error("Please re-invite the bot with both 'bot' and 'applications.commands' scopes")
+        await ctx.send("⚠️ Command sync timed out. Make sure the bot was invited with the 'applications.commands' scope.")
+    except discord.RateLimited as e:
+        logger.warning(f"Command sync ratelimited for {e.retry_after:.0f}s")
+        try:
+            await ctx.send(f"⏳ Discord is ratelimiting command sync, try again in {e.retry_after:.0f} seconds.")
+        except discord.DiscordException as send_error:
+            logger.error(f"Could not report sync ratelimit: {send_error}")
     except discord.Forbidden:
         logger.error("Bot lacks permissions to register slash commands")
         logger.error("Please re-invite the bot with 'applications.commands' scope")
+        await ctx.send("❌ Bot lacks permissions to register slash commands.")
     except Exception as e:
         logger.error(f"Failed to sync global commands: {e}")
         logger.error(f"Error type: {type(e).__name__}")
-    
-    # List current commands in tree
-    logger.info(f"Commands in tree: {[cmd.name for cmd in bot.tree.get_commands()]}")
-    
-    # Start hourly leaderboard task
-    if not hourly_leaderboard.is_running():
-        hourly_leaderboard.start()
+        await ctx.send(f"❌ Failed to sync commands: {type(e).__name__}")
+
+# Rank emoji lookup tables, built once at import
+_EMOJI_BY_RANK = {rank.lower(): emoji for rank, emoji in RANK_EMOJIS.items()}
+# Longest names first so partial matches prefer the most specific rank
+_EMOJI_SUBSTR = sorted(_EMOJI_BY_RANK.items(), key=lambda item: -len(item[0]))
 
 def get_rank_emoji(rank_name: str) -> str:
     """Get the appropriate emoji for a rank name"""
-    # Translate rank name to English if needed
+    # Translate rank name to English if needed. Not memoized: a rank that isn't translated
+    # yet may be once translate_text_async has fetched it
     translated_rank = translator.translate_rank(rank_name)
     
-    # Log for debugging if needed
-    # logger.debug(f"Original rank: '{rank_name}' -> Translated: '{translated_rank}'")
-    
     # Always try lowercase first since our emoji keys are lowercase
-    lowercase_rank = translated_rank.lower()
+    return _emoji_for_english_rank(translated_rank.lower())
+
+@functools.lru_cache(maxsize=512)
+def _emoji_for_english_rank(lowercase_rank: str) -> str:
+    """Look up the emoji for a lowercase English rank name"""
+    emoji = _EMOJI_BY_RANK.get(lowercase_rank)
+    if emoji:
+        return emoji
     
-    if lowercase_rank in RANK_EMOJIS:
-        return RANK_EMOJIS[lowercase_rank]
-    else:
-        # Try to find a partial match
-        for rank_key in RANK_EMOJIS.keys():
-            if lowercase_rank in rank_key or rank_key in lowercase_rank:
-                return RANK_EMOJIS[rank_key]
-        
-        # If no match found, return question mark
-        return "❓"
+    # Try to find a partial match, otherwise return question mark
+    return next(
+        (emoji for rank_key, emoji in _EMOJI_SUBSTR if rank_key in lowercase_rank or lowercase_rank in rank_key),
+        "❓"
+    )
+
+def _number_field(value) -> str:
+    """Format a scraped count with thousands separators, or 'N/A' when it is missing"""
+    return f"{value:,}" if value is not None else 'N/A'
+
+def _rank_field(position) -> str:
+    """Format a leaderboard position as '#N', or 'N/A' when the player is unranked"""
+    return f"#{position}" if position != 'N/A' else 'N/A'
 
 def create_player_embed(player_data: dict) -> discord.Embed:
     """Create a Discord embed for player statistics with activity status"""
 
+    # Look up each field once
+    experience = player_data.get('experience')
+    kills = player_data.get('kills')
+    deaths = player_data.get('deaths')
+    goldboxes = player_data.get('goldboxes')
+    premium = player_data.get('premium')
+    experience_rank = player_data.get('experience_rank', 'N/A')
+    crystals_rank = player_data.get('crystals_rank', 'N/A')
+    kills_rank = player_data.get('kills_rank', 'N/A')
+    efficiency_rank = player_data.get('efficiency_rank', 'N/A')
+
     # Get rank emoji
     rank_emoji = get_rank_emoji(player_data.get('rank', ''))
 
     # Create embed with player info
     embed = discord.Embed(
         title=f"{rank_emoji} {player_data['nickname']}",
-        description=f"{translator.translate_text(player_data.get('rank', 'Unknown Rank'))}",
+        description=f"{translator.translate_cached(player_data.get('rank', 'Unknown Rank'))}",
         color=0x00ff00,
-        timestamp=datetime.utcnow()
+        timestamp=discord.utils.utcnow()
     )
 
     # Main statistics section
     embed.add_field(
         name="⭐ Experience",
-        value=f"{player_data.get('experience', 'N/A'):,}",
+        value=_number_field(experience),
         inline=True
     )
 
     embed.add_field(
         name="💎 Crystals Position",
-        value=f"#{player_data.get('crystals_rank', 'N/A')}" if player_data.get('crystals_rank', 'N/A') != 'N/A' else 'N/A',
+        value=_rank_field(crystals_rank),
         inline=True
     )
 
     embed.add_field(
         name="⚔️ Kills",
-        value=f"{player_data.get('kills', 'N/A'):,}",
+        value=_number_field(kills),
         inline=True
     )
 
     embed.add_field(
         name="💀 Deaths",
-        value=f"{player_data.get('deaths', 'N/A'):,}",
+        value=_number_field(deaths),
         inline=True
     )
 
@@ -127,23 +199,22 @@ def create_player_embed(player_data: dict) -> discord.Embed:
 
     embed.add_field(
         name="🏆 Efficiency Rank",
-        value=f"#{player_data.get('efficiency_rank', 'N/A')}" if player_data.get('efficiency_rank', 'N/A') != 'N/A' else 'N/A',
+        value=_rank_field(efficiency_rank),
         inline=True
     )
 
     # Add premium status
-    premium_emoji = "👑" if player_data.get('premium') else "❌"
+    premium_emoji = "👑" if premium else "❌"
     embed.add_field(
         name="💳 Premium Status",
-        value=f"{premium_emoji} {'Premium' if player_data.get('premium') else 'Free'}",
+        value=f"{premium_emoji} {'Premium' if premium else 'Free'}",
         inline=True
     )
 
     # Add goldboxes with emoji
-    from config import GOLDBOX_EMOJI
     embed.add_field(
         name=f"{GOLDBOX_EMOJI} Gold Boxes",
-        value=f"{player_data.get('goldboxes', 'N/A')}",
+        value=_number_field(goldboxes),
         inline=True
     )
 
@@ -165,14 +236,14 @@ def create_player_embed(player_data: dict) -> discord.Embed:
 
     # Add current rankings section
     rankings_data = []
-    if player_data.get('experience_rank') and player_data.get('experience_rank') != 'N/A':
-        rankings_data.append(f"By experience: #{player_data.get('experience_rank')}")
-    if player_data.get('crystals_rank') and player_data.get('crystals_rank') != 'N/A':
-        rankings_data.append(f"By crystals: #{player_data.get('crystals_rank')}")
-    if player_data.get('kills_rank') and player_data.get('kills_rank') != 'N/A':
-        rankings_data.append(f"By kills: #{player_data.get('kills_rank')}")
-    if player_data.get('efficiency_rank') and player_data.get('efficiency_rank') != 'N/A':
-        rankings_data.append(f"By efficiency: #{player_data.get('efficiency_rank')}")
+    if experience_rank and experience_rank != 'N/A':
+        rankings_data.append(f"By experience: #{experience_rank}")
+    if crystals_rank and crystals_rank != 'N/A':
+        rankings_data.append(f"By crystals: #{crystals_rank}")
+    if kills_rank and kills_rank != 'N/A':
+        rankings_data.append(f"By kills: #{kills_rank}")
+    if efficiency_rank and efficiency_rank != 'N/A':
+        rankings_data.append(f"By efficiency: #{efficiency_rank}")
 
     if rankings_data:
         embed.add_field(
@@ -182,19 +253,39 @@ def create_player_embed(player_data: dict) -> discord.Embed:
         )
 
     # Add equipment info if available
-    if player_data.get('equipment'):
-        equipment_text = translator.translate_text(player_data['equipment'])
+    equipment = player_data.get('equipment')
+    if equipment:
+        equipment_text = translator.translate_cached(equipment)
         embed.add_field(
             name="🛡️ Current Equipment",
             value=equipment_text,
             inline=False
         )
 
-    embed.set_footer(text="RTanks Online Statistics", icon_url="https://ratings.ranked-rtanks.online/public/images/logo.png")
+    embed.set_footer(text="RTanks Online Statistics", icon_url=FOOTER_ICON_URL)
 
     return embed
 
 
+async def _send_ratelimited_notice(interaction: discord.Interaction, error: discord.RateLimited):
+    """Tell the user Discord is ratelimiting the bot instead of reporting a generic failure"""
+    logger.warning(f"Ratelimited for {error.retry_after:.0f}s while handling an interaction")
+    
+    embed = discord.Embed(
+        title="⏳ Slow Down",
+        description=f"Discord is ratelimiting the bot. Please try again in {error.retry_after:.0f} seconds.",
+        color=0xffa500
+    )
+    
+    # This send can be ratelimited too, in which case there is nothing more to do
+    try:
+        if interaction.response.is_done():
+            await interaction.followup.send(embed=embed, ephemeral=True)
+        else:
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+    except discord.DiscordException as e:
+        logger.error(f"Could not send ratelimit notice: {e}")
+
 @bot.tree.command(name="player", description="Get RTanks Online player statistics")
 @discord.app_commands.describe(nickname="The player's nickname to look up")
 async def player_stats(interaction: discord.Interaction, nickname: str):
@@ -225,10 +316,19 @@ async def player_stats(interaction: discord.Interaction, nickname: str):
             await interaction.followup.send(embed=embed)
             return
         
+        # Fetch online translations up front so building the embed never waits on the network
+        await asyncio.gather(
+            translator.translate_text_async(player_data.get('rank', '')),
+            translator.translate_text_async(player_data.get('equipment', ''))
+        )
+        
         # Create and send embed
         embed = create_player_embed(player_data)
         await interaction.followup.send(embed=embed)
         
+    except discord.RateLimited as e:
+        await _send_ratelimited_notice(interaction, e)
+        
     except Exception as e:
         logger.error(f"Error fetching player stats for {nickname}: {e}")
         
@@ -250,6 +350,34 @@ async def player_stats(interaction: discord.Interaction, nickname: str):
         
         await interaction.followup.send(embed=embed)
 
+# Leaderboard category options, shared by every LeaderboardView
+_LB_OPTIONS = [
+    discord.SelectOption(
+        label="Experience Leaderboard",
+        description="Top players by earned experience",
+        value="experience",
+        emoji="📊"
+    ),
+    discord.SelectOption(
+        label="Crystals Leaderboard", 
+        description="Top players by earned crystals",
+        value="crystals",
+        emoji="💎"
+    ),
+    discord.SelectOption(
+        label="Kills Leaderboard",
+        description="Top players by total kills",
+        value="kills", 
+        emoji="⚔️"
+    ),
+    discord.SelectOption(
+        label="Efficiency Leaderboard",
+        description="Top players by efficiency rating",
+        value="efficiency",
+        emoji="🏆"
+    )
+]
+
 class LeaderboardView(discord.ui.View):
     """View for leaderboard category selection"""
     
@@ -258,39 +386,14 @@ class LeaderboardView(discord.ui.View):
     
     @discord.ui.select(
         placeholder="Choose a leaderboard category...",
-        options=[
-            discord.SelectOption(
-                label="Experience Leaderboard",
-                description="Top players by earned experience",
-                value="experience",
-                emoji="📊"
-            ),
-            discord.SelectOption(
-                label="Crystals Leaderboard", 
-                description="Top players by earned crystals",
-                value="crystals",
-                emoji="💎"
-            ),
-            discord.SelectOption(
-                label="Kills Leaderboard",
-                description="Top players by total kills",
-                value="kills", 
-                emoji="⚔️"
-            ),
-            discord.SelectOption(
-                label="Efficiency Leaderboard",
-                description="Top players by efficiency rating",
-                value="efficiency",
-                emoji="🏆"
-            )
-        ]
+        options=_LB_OPTIONS
     )
     async def select_leaderboard(self, interaction: discord.Interaction, select: discord.ui.Select):
         await interaction.response.defer()
         
         try:
             category = select.values[0]
-            leaderboard_data = await scraper.get_leaderboard(category)
+            leaderboard_data = await get_cached_leaderboard(category)
             
             if not leaderboard_data:
                 embed = discord.Embed(
@@ -305,6 +408,9 @@ class LeaderboardView(discord.ui.View):
             embed = create_leaderboard_embed(leaderboard_data, category)
             await interaction.followup.send(embed=embed)
             
+        except discord.RateLimited as e:
+            await _send_ratelimited_notice(interaction, e)
+            
         except Exception as e:
             logger.error(f"Error fetching leaderboard for {select.values[0]}: {e}")
             
@@ -315,6 +421,9 @@ class LeaderboardView(discord.ui.View):
             )
             await interaction.followup.send(embed=embed)
 
+# Leaderboard position labels, with medals for the top 3
+_POSITIONS = ("🥇", "🥈", "🥉") + tuple(f"{i}." for i in range(4, 11))
+
 def create_leaderboard_embed(leaderboard_data: list, category: str) -> discord.Embed:
     """Create a Discord embed for leaderboard data"""
     
@@ -326,26 +435,19 @@ def create_leaderboard_embed(leaderboard_data: list, category: str) -> discord.E
         title=f"{emoji} {title}",
         description=f"Top 10 players in RTanks Online",
         color=0x00ff00,
-        timestamp=datetime.utcnow()
+        timestamp=discord.utils.utcnow()
     )
     
     # Add top 10 players to avoid Discord's 1024 character limit
-    leaderboard_text = ""
+    lines = []
     for i, player in enumerate(leaderboard_data[:10], 1):
         rank_emoji = get_rank_emoji(player.get('rank', ''))
         
-        # Format position with medals for top 3
-        if i == 1:
-            position = "🥇"
-        elif i == 2:
-            position = "🥈" 
-        elif i == 3:
-            position = "🥉"
-        else:
-            position = f"{i}."
+        position = _POSITIONS[i - 1]
         
+        # Scraper values are ints unless the cell couldn't be parsed
         value = player.get('value', 'N/A')
-        if isinstance(value, (int, float)) and value >= 1000:
+        if isinstance(value, int):
             value = f"{value:,}"
         
         # Truncate long nicknames to prevent field overflow
@@ -353,12 +455,13 @@ def create_leaderboard_embed(leaderboard_data: list, category: str) -> discord.E
         if len(nickname) > 15:
             nickname = nickname[:12] + "..."
         
-        leaderboard_text += f"{position} {rank_emoji} **{nickname}** - {value}\n"
+        lines.append(f"{position} {rank_emoji} **{nickname}** - {value}")
+    
+    leaderboard_text = "\n".join(lines)
     
     # Split into multiple fields if still too long
     if len(leaderboard_text) > 1000:
         # Split into two fields
-        lines = leaderboard_text.strip().split('\n')
         mid_point = len(lines) // 2
         
         embed.add_field(
@@ -380,7 +483,7 @@ def create_leaderboard_embed(leaderboard_data: list, category: str) -> discord.E
     
     embed.set_footer(
         text="RTanks Online Leaderboard • Updates weekly", 
-        icon_url="https://ratings.ranked-rtanks.online/public/images/logo.png"
+        icon_url=FOOTER_ICON_URL
     )
     
     return embed
@@ -398,6 +501,21 @@ async def leaderboard(interaction: discord.Interaction):
     view = LeaderboardView()
     await interaction.response.send_message(embed=embed, view=view)
 
+async def _send_with_retry(channel: discord.abc.Messageable, max_attempts: int = 3, **kwargs):
+    """Send a message, backing off and retrying when Discord ratelimits us"""
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return await channel.send(**kwargs)
+        except discord.RateLimited as e:
+            if attempt == max_attempts:
+                raise
+            
+            # Never retry before Discord says we may
+            delay = max(e.retry_after, 2 ** attempt) + random.uniform(0, 0.5)
+            
+            logger.warning(f"Ratelimited sending to {channel}, retrying in {delay:.1f}s (attempt {attempt}/{max_attempts})")
+            await asyncio.sleep(delay)
+
 @tasks.loop(hours=1)
 async def hourly_leaderboard():
     """Post leaderboards to designated channel every hour"""
@@ -412,20 +530,37 @@ async def hourly_leaderboard():
         return
     
     try:
-        # Post all leaderboard categories
-        for category_key, category_info in LEADERBOARD_CATEGORIES.items():
-            try:
-                leaderboard_data = await scraper.get_leaderboard(category_key)
-                
-                if leaderboard_data:
-                    embed = create_leaderboard_embed(leaderboard_data, category_key)
-                    await channel.send(embed=embed)
-                
-                # Small delay between posts
-                await asyncio.sleep(2)
-                
-            except Exception as e:
-                logger.error(f"Error posting {category_key} leaderboard: {e}")
+        # Fetch all leaderboard categories concurrently
+        category_keys = list(LEADERBOARD_CATEGORIES)
+        results = await asyncio.gather(
+            *(get_cached_leaderboard(category_key) for category_key in category_keys),
+            return_exceptions=True
+        )
+        
+        available = {}
+        for category_key, leaderboard_data in zip(category_keys, results):
+            if isinstance(leaderboard_data, Exception):
+                logger.error(f"Error fetching {category_key} leaderboard: {leaderboard_data}")
+                continue
+            
+            if leaderboard_data:
+                available[category_key] = leaderboard_data
+        
+        if not available:
+            logger.warning("No leaderboard data available to post")
+            return
+        
+        # Leaderboards only update weekly, so don't rebuild or repost identical data
+        hashes = {key: _leaderboard_hash(data) for key, data in available.items()}
+        if all(_last_lb_hash.get(key) == h for key, h in hashes.items()):
+            logger.info("Leaderboards unchanged since last post, skipping")
+            return
+        
+        embeds = [create_leaderboard_embed(data, key) for key, data in available.items()]
+        
+        # Post every category in a single message (Discord allows up to 10 embeds)
+        await _send_with_retry(channel, embeds=embeds[:10])
+        _last_lb_hash.update(hashes)
         
         logger.info("Hourly leaderboards posted successfully")
         
@@ -442,6 +577,11 @@ async def before_hourly_leaderboard():
 async def on_app_command_error(interaction: discord.Interaction, error: discord.app_commands.AppCommandError):
     """Global error handler for slash commands"""
     
+    original = getattr(error, 'original', error)
+    if isinstance(original, discord.RateLimited):
+        await _send_ratelimited_notice(interaction, original)
+        return
+    
     logger.error(f"Command error: {error}")
     
     embed = discord.Embed(
@@ -456,7 +596,14 @@ async def on_app_command_error(interaction: discord.Interaction, error: discord.
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
 # Run the bot
-from keep_alive import keep_alive
+async def run_bot(token: str):
+    """Run the bot and close the scraper and translator sessions on shutdown"""
+    async with bot:
+        try:
+            await bot.start(token)
+        finally:
+            await scraper.close()
+            await translator.close()
 
 if __name__ == "__main__":
     token = os.getenv('DISCORD_BOT_TOKEN')
@@ -464,6 +611,8 @@ if __name__ == "__main__":
         logger.error("DISCORD_BOT_TOKEN environment variable is required")
         exit(1)
 
+    # Imported here so importing main without running the bot (e.g. from tools) does not load Flask
+    from keep_alive import keep_alive
     keep_alive()  # Prevents bot from sleeping on Render
-    bot.run(token)
+    asyncio.run(run_bot(token))
 
@@ -82,36 +82,157 @@ class RTanksPlayerScraper:
     
     import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, FeatureNotFound
+from collections import OrderedDict
 import logging
 import re
-from typing import Dict, List, Optional
+import time
+from typing import Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Patterns used on every scraped page, compiled once
+_RE_EXP = re.compile(r'(\d{1,3}(?:\s\d{3})*)')
+_RE_NONDIGIT = re.compile(r'[^\d]')
+
+# Deletes every Latin-1 character except 0-9, for stripping separators out of numbers like '2 106'
+_NON_DIGIT_TABLE = str.maketrans('', '', ''.join(chr(c) for c in range(256) if not '0' <= chr(c) <= '9'))
+# src of the first <img> served from imgur (the player's rank badge), matched on the raw HTML.
+# HTML comments and <script> blocks are matched as whole alternatives so <img> text inside
+# them is skipped, as the parsed tree would. Only group 1 is set on a real <img> match
+_RE_IMGUR_IMG = re.compile(
+    r'<!--.*?-->'
+    r'|<script\b.*?</script\s*>'
+    r'|<img\b[^>]*?(?<![\w-])src\s*=\s*["\']?([^"\'\s>]*imgur\.com[^"\'\s>]*)',
+    re.IGNORECASE | re.DOTALL
+)
+_RE_EQUIP = re.compile(r'equipment|loadout')
+_RE_CRYSTAL = re.compile(r'кристалл')
+
+# Leaderboard categories that have their own section on the main page, by header text
+_LEADERBOARD_SECTIONS = {
+    'crystals': _RE_CRYSTAL,
+}
+
+# Fetched pages are reused for a short while so bursts of identical lookups hit the site once
+_PAGE_TTL = 30.0
+_PAGE_CACHE_SIZE = 128
+
+def _parse_html(html_content: str) -> BeautifulSoup:
+    """Parse HTML with the C-backed lxml parser, falling back to html.parser if lxml isn't installed"""
+    try:
+        return BeautifulSoup(html_content, 'lxml')
+    except FeatureNotFound:
+        return BeautifulSoup(html_content, 'html.parser')
+
+def _find_rank_badge_src(html_content: str) -> Optional[str]:
+    """Return the src of the first imgur <img> outside comments and scripts, if any"""
+    for match in _RE_IMGUR_IMG.finditer(html_content):
+        if match.group(1):
+            return match.group(1)
+    return None
+
+def _coerce_int(text: str) -> Optional[int]:
+    """Parse a formatted number like '2 106', returning None when it has no digits"""
+    if not text:
+        return None
+    digits = text.translate(_NON_DIGIT_TABLE)
+    if not digits.isdecimal():
+        # Something outside Latin-1 survived the table (e.g. a narrow no-break space)
+        digits = _RE_NONDIGIT.sub('', digits)
+    return int(digits) if digits else None
+
+def _parse_ratio(text: str) -> float:
+    """Parse a K/D ratio, which the site writes with a decimal comma"""
+    return float(text.replace(',', '.'))
+
+def _parse_yes(text: str) -> bool:
+    """Parse a yes/no cell, in Russian or English"""
+    lowered = text.lower()
+    return 'да' in lowered or 'yes' in lowered
+
+# Player stats table rows: (keywords in the first cell, field, parser for the second cell)
+_STAT_FIELDS = (
+    (('уничтожил', 'kills'), 'kills', _coerce_int),
+    (('подбит', 'deaths'), 'deaths', _coerce_int),
+    (('у/п', 'k/d', 'эффективность'), 'kd_ratio', _parse_ratio),
+    (('премиум', 'premium'), 'premium', _parse_yes),
+    (('золот', 'gold'), 'goldboxes', _coerce_int),
+)
+
+# Ranking position rows: (keyword in the first cell, field)
+_RANKING_FIELDS = (
+    ('по опыту', 'experience_rank'),
+    ('по киллам', 'kills_rank'),
+    ('по эффективности', 'efficiency_rank'),
+)
+
 class RTanksPlayerScraper:
     """Scraper for RTanks Online player statistics and leaderboards"""
     
     def __init__(self):
         self.base_url = "https://ratings.ranked-rtanks.online"
-        self.session = None
+        self.session: Optional[aiohttp.ClientSession] = None
+        # url -> (fetched_at, html), oldest first
+        self._page_cache: OrderedDict[str, Tuple[float, str]] = OrderedDict()
+        # url -> (fetched_at, parsed page); only holds urls that are also in the page cache
+        self._soup_cache: Dict[str, Tuple[float, BeautifulSoup]] = {}
+        # url -> in-flight download / parse, so concurrent callers share one of each
+        self._page_requests: Dict[str, asyncio.Future] = {}
+        self._soup_requests: Dict[str, asyncio.Future] = {}
+        # Cap in-flight requests so batch lookups stay polite to the site
+        self._fetch_semaphore = asyncio.Semaphore(16)
 
     async def _get_session(self):
+        # One pooled session for every request so keep-alive connections to the ratings host are reused
         if self.session is None or self.session.closed:
             self.session = aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=30),
+                connector=aiohttp.TCPConnector(
+                    limit=64,
+                    limit_per_host=32,
+                    use_dns_cache=True,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=75
+                ),
+                # Fail fast on a dead host instead of waiting out the whole total timeout
+                timeout=aiohttp.ClientTimeout(total=30, sock_connect=5, sock_read=20),
                 headers={
                     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
                 }
             )
         return self.session
 
+    async def _run_once(self, requests: Dict[str, asyncio.Future], url: str, make_request):
+        """Run make_request() for url unless it is already running, and await the shared result"""
+        request = requests.get(url)
+        if request is None:
+            request = asyncio.ensure_future(make_request())
+            requests[url] = request
+            request.add_done_callback(lambda _: requests.pop(url, None))
+        # Shielded so one caller being cancelled doesn't cancel the request for everyone else
+        return await asyncio.shield(request)
+
     async def _fetch_page(self, url: str) -> Optional[str]:
+        entry = self._page_cache.get(url)
+        if entry and time.monotonic() - entry[0] < _PAGE_TTL:
+            self._page_cache.move_to_end(url)
+            return entry[1]
+
+        return await self._run_once(self._page_requests, url, lambda: self._download_page(url))
+
+    async def _download_page(self, url: str) -> Optional[str]:
+        now = time.monotonic()
         try:
             session = await self._get_session()
-            async with session.get(url) as response:
+            async with self._fetch_semaphore, session.get(url) as response:
                 if response.status == 200:
-                    return await response.text()
+                    text = await response.text()
+                    self._page_cache[url] = (now, text)
+                    self._page_cache.move_to_end(url)
+                    if len(self._page_cache) > _PAGE_CACHE_SIZE:
+                        evicted_url, _ = self._page_cache.popitem(last=False)
+                        self._soup_cache.pop(evicted_url, None)
+                    return text
                 else:
                     logger.error(f"HTTP {response.status} when fetching {url}")
                     return None
@@ -119,38 +240,59 @@ class RTanksPlayerScraper:
             logger.error(f"Error fetching {url}: {e}")
             return None
 
+    async def _fetch_soup(self, url: str) -> Optional[BeautifulSoup]:
+        """Fetch and parse a page, reusing the parsed tree while its HTML is still cached"""
+        entry = self._soup_cache.get(url)
+        if entry and time.monotonic() - entry[0] < _PAGE_TTL:
+            return entry[1]
+
+        return await self._run_once(self._soup_requests, url, lambda: self._parse_page(url))
+
+    async def _parse_page(self, url: str) -> Optional[BeautifulSoup]:
+        html_content = await self._fetch_page(url)
+        if not html_content:
+            return None
+
+        # Date the tree by when its HTML was fetched so both caches expire together.
+        # Callers must treat the returned soup as read-only since it is shared.
+        soup = _parse_html(html_content)
+        page_entry = self._page_cache.get(url)
+        self._soup_cache[url] = (page_entry[0] if page_entry else time.monotonic(), soup)
+        return soup
+
+    # Rank badge image filenames on imgur -> rank names
+    _RANK_MAPPINGS = {
+        'a3UCeT5.png': 'Warrant Officer 5',  # Уорэнт-офицер 5
+        'O6Tb9li.png': 'Colonel',             # Полковник
+        'rCN2gJm.png': 'Lieutenant Colonel',  # Подполковник
+        'R69LmLt.png': 'Major',               # Майор
+        'Ljy2jDX.png': 'Captain',             # Капитан
+        'lTXxLVJ.png': 'First Lieutenant',    # Первый лейтенант
+        'iTyjOt3.png': 'Second Lieutenant',   # Второй лейтенант
+        'BIr8vRX.png': 'Warrant Officer 4',  # Уорэнт-офицер 4
+        'sppjRis.png': 'Warrant Officer 3',  # Уорэнт-офицер 3
+        'LATOpxZ.png': 'Warrant Officer 2',  # Уорэнт-офицер 2
+        'ekbJYyf.png': 'Warrant Officer 1',  # Уорэнт-офицер 1
+        'GzJRzgz.png': 'Master Sergeant',    # Мастер-сержант
+        'pxzNyxi.png': 'Sergeant First Class', # Старший сержант
+        'UWup9qJ.png': 'Staff Sergeant',     # Штаб-сержант
+        'dSE90bT.png': 'Sergeant',           # Сержант
+        'paF1myt.png': 'Corporal',           # Капрал
+        'wPZnaG0.png': 'Lance Corporal',     # Младший капрал
+        'Or6Ajto.png': 'Private First Class', # Рядовой первого класса
+        'AYAs02w.png': 'Private',            # Рядовой
+        'M4GBQIq.png': 'Recruit',            # Новобранец
+        'Q2YgFQ1.png': 'Legend',             # Легенда
+        'rO3Hs5f.png': 'Generalissimo',      # Генералиссимус
+        'OQEHkm7.png': 'General',            # Генерал
+        'BNZpCPo.png': 'Lieutenant General', # Генерал-лейтенант
+        'eQXJOZE.png': 'Major General',      # Генерал-майор
+        'Sluzy': 'Brigadier General'         # Бригадный генерал
+    }
+
     def _extract_rank_from_image(self, img_src: str) -> str:
-        rank_mappings = {
-            'a3UCeT5.png': 'Warrant Officer 5',
-            'O6Tb9li.png': 'Colonel',
-            'rCN2gJm.png': 'Lieutenant Colonel',
-            'R69LmLt.png': 'Major',
-            'Ljy2jDX.png': 'Captain',
-            'lTXxLVJ.png': 'First Lieutenant',
-            'iTyjOt3.png': 'Second Lieutenant',
-            'BIr8vRX.png': 'Warrant Officer 4',
-            'sppjRis.png': 'Warrant Officer 3',
-            'LATOpxZ.png': 'Warrant Officer 2',
-            'ekbJYyf.png': 'Warrant Officer 1',
-            'GzJRzgz.png': 'Master Sergeant',
-            'pxzNyxi.png': 'Sergeant First Class',
-            'UWup9qJ.png': 'Staff Sergeant',
-            'dSE90bT.png': 'Sergeant',
-            'paF1myt.png': 'Corporal',
-            'wPZnaG0.png': 'Lance Corporal',
-            'Or6Ajto.png': 'Private First Class',
-            'AYAs02w.png': 'Private',
-            'M4GBQIq.png': 'Recruit',
-            'Q2YgFQ1.png': 'Legend',
-            'rO3Hs5f.png': 'Generalissimo',
-            'OQEHkm7.png': 'General',
-            'BNZpCPo.png': 'Lieutenant General',
-            'eQXJOZE.png': 'Major General',
-            'Sluzy': 'Brigadier General'
-        }
         if 'imgur.com' in img_src:
-            filename = img_src.split('/')[-1]
-            return rank_mappings.get(filename, 'Unknown Rank')
+            return self._RANK_MAPPINGS.get(img_src.rpartition('/')[2], 'Unknown Rank')
         return 'Unknown Rank'
 
     async def get_player_stats(self, nickname: str) -> Optional[Dict]:
@@ -159,7 +301,6 @@ class RTanksPlayerScraper:
             html_content = await self._fetch_page(player_url)
             if not html_content:
                 return None
-            soup = BeautifulSoup(html_content, 'html.parser')
             player_data = {
                 'nickname': nickname,
                 'rank': 'Unknown',
@@ -177,6 +318,13 @@ class RTanksPlayerScraper:
                 'activity': 'Unknown'
             }
 
+            # Extract rank from image straight from the HTML, no tree search needed
+            rank_img_src = _find_rank_badge_src(html_content)
+            if rank_img_src:
+                player_data['rank'] = self._extract_rank_from_image(rank_img_src)
+
+            soup = _parse_html(html_content)
+
             # Extract activity status (online/offline)
             activity_dot = soup.find('span', class_='user_online')
             if activity_dot and 'style' in activity_dot.attrs:
@@ -186,11 +334,6 @@ class RTanksPlayerScraper:
                 elif 'gray' in style.lower() or 'grey' in style.lower():
                     player_data['activity'] = 'Offline'
 
-            # Extract rank from image
-            rank_img = soup.find('img', src=re.compile(r'imgur\.com'))
-            if rank_img:
-                player_data['rank'] = self._extract_rank_from_image(rank_img['src'])
-
             gray_fonts = soup.find_all('font', attrs={'style': lambda x: x and 'gray' in x.lower()})
             for font in gray_fonts:
                 rank_text = font.get_text(strip=True)
@@ -201,52 +344,40 @@ class RTanksPlayerScraper:
             xp_element = soup.find('div', class_='text_xp')
             if xp_element:
                 xp_text = xp_element.get_text(strip=True)
-                exp_match = re.search(r'(\d{1,3}(?:\s\d{3})*)', xp_text)
+                exp_match = _RE_EXP.search(xp_text)
                 if exp_match:
-                    player_data['experience'] = int(exp_match.group(1).replace(' ', ''))
-
-            tables = soup.find_all('table')
-            for table in tables:
-                rows = table.find_all('tr')
-                for row in rows:
-                    cells = row.find_all('td')
-                    if len(cells) >= 2:
-                        key = cells[0].get_text(strip=True).lower()
-                        value = cells[1].get_text(strip=True)
-                        if 'уничтожил' in key or 'kills' in key:
-                            player_data['kills'] = int(re.sub(r'[^\d]', '', value) or 0)
-                        elif 'подбит' in key or 'deaths' in key:
-                            player_data['deaths'] = int(re.sub(r'[^\d]', '', value) or 0)
-                        elif 'у/п' in key or 'k/d' in key or 'эффективность' in key:
+                    player_data['experience'] = _coerce_int(exp_match.group(1))
+
+            # Stats and ranking positions share the same tables, so walk them once
+            for table in soup.find_all('table'):
+                for row in table.find_all('tr'):
+                    # Only the first three cells are ever read, so stop looking after them
+                    cells = row.find_all('td', limit=3)
+                    if len(cells) < 2:
+                        continue
+
+                    key = cells[0].get_text(strip=True).lower()
+                    value = cells[1].get_text(strip=True)
+                    for keywords, field, parse in _STAT_FIELDS:
+                        if any(k in key for k in keywords):
                             try:
-                                player_data['kd_ratio'] = float(value.replace(',', '.'))
-                            except:
+                                player_data[field] = parse(value)
+                            except ValueError:
                                 pass
-                        elif 'премиум' in key or 'premium' in key:
-                            player_data['premium'] = 'да' in value.lower() or 'yes' in value.lower()
-                        elif 'золот' in key or 'gold' in key:
-                            player_data['goldboxes'] = int(re.sub(r'[^\d]', '', value) or 0)
+                            break
 
-            for table in soup.find_all('table'):
-                rows = table.find_all('tr')
-                for row in rows:
-                    cells = row.find_all('td')
                     if len(cells) >= 3:
-                        category = cells[0].get_text(strip=True).lower()
-                        rank = cells[1].get_text(strip=True).replace('#', '')
-                        if 'по опыту' in category:
-                            player_data['experience_rank'] = rank if rank != '0' else 'N/A'
-                        elif 'по киллам' in category:
-                            player_data['kills_rank'] = rank if rank != '0' else 'N/A'
-                        elif 'по эффективности' in category:
-                            player_data['efficiency_rank'] = rank if rank != '0' else 'N/A'
-
-            equipment_sections = soup.find_all('div', class_=re.compile(r'equipment|loadout'))
+                        for keyword, field in _RANKING_FIELDS:
+                            if keyword in key:
+                                rank = value.replace('#', '')
+                                player_data[field] = rank if rank != '0' else 'N/A'
+                                break
+
+            equipment_sections = soup.find_all('div', class_=_RE_EQUIP)
             if equipment_sections:
-                equipment_text = ""
-                for section in equipment_sections:
-                    equipment_text += section.get_text(strip=True) + " "
-                player_data['equipment'] = equipment_text.strip()
+                player_data['equipment'] = ' '.join(
+                    section.get_text(strip=True) for section in equipment_sections
+                ).strip()
 
             return player_data
 
@@ -254,10 +385,59 @@ class RTanksPlayerScraper:
             logger.error(f"Error parsing player data for {nickname}: {e}")
             return None
 
+    async def get_many_player_stats(self, nicknames: List[str]) -> List[Optional[Dict]]:
+        """Get statistics for several players concurrently, in the same order as nicknames"""
+        results = await asyncio.gather(
+            *(self.get_player_stats(nickname) for nickname in nicknames),
+            return_exceptions=True
+        )
+        return [None if isinstance(result, Exception) else result for result in results]
+
     async def close(self):
         if self.session and not self.session.closed:
             await self.session.close()
 
+    def _parse_leaderboard_table(self, table) -> List[Dict]:
+        """Extract position, nickname, rank and value from each row of a leaderboard table"""
+        leaderboard_data = []
+        for row in table.find_all('tr'):
+            cells = row.find_all('td', limit=3)
+            if len(cells) < 3:
+                continue
+            
+            try:
+                # Player cell contains image and name
+                player_cell = cells[1]
+                player_link = player_cell.find('a')
+                if not player_link:
+                    continue
+                
+                # Extract rank from image
+                rank_img = player_cell.find('img')
+                rank = 'Unknown'
+                if rank_img and 'src' in rank_img.attrs:
+                    rank = self._extract_rank_from_image(rank_img['src'])
+                
+                # Extract value (experience, crystals, etc.)
+                value_text = cells[2].get_text(strip=True)
+                try:
+                    value = int(value_text.replace(' ', '').replace(',', ''))
+                except ValueError:
+                    value = value_text
+                
+                leaderboard_data.append({
+                    'position': cells[0].get_text(strip=True),
+                    'nickname': player_link.get_text(strip=True),
+                    'rank': rank,
+                    'value': value
+                })
+            
+            except Exception as e:
+                logger.debug(f"Error parsing leaderboard row: {e}")
+                continue
+        
+        return leaderboard_data
+
     async def get_leaderboard(self, category: str) -> Optional[List[Dict]]:
         """Get leaderboard data for specified category"""
         try:
@@ -272,96 +452,27 @@ class RTanksPlayerScraper:
                 # For other categories, we'll parse what's available
                 url = self.base_url
             
-            html_content = await self._fetch_page(url)
-            if not html_content:
+            soup = await self._fetch_soup(url)
+            if soup is None:
                 return None
             
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Find leaderboard tables
-            leaderboard_data = []
-            
-            # Look for the main leaderboard table
-            tables = soup.find_all('table')
-            
-            for table in tables:
-                rows = table.find_all('tr')
-                
-                for row in rows:
-                    cells = row.find_all('td')
-                    if len(cells) >= 3:
-                        try:
-                            # Extract position, player info, and value
-                            position = cells[0].get_text(strip=True)
-                            
-                            # Player cell contains image and name
-                            player_cell = cells[1]
-                            player_link = player_cell.find('a')
-                            if player_link:
-                                nickname = player_link.get_text(strip=True)
-                                
-                                # Extract rank from image
-                                rank_img = player_cell.find('img')
-                                rank = 'Unknown'
-                                if rank_img and 'src' in rank_img.attrs:
-                                    rank = self._extract_rank_from_image(rank_img['src'])
-                                
-                                # Extract value (experience, crystals, etc.)
-                                value_text = cells[2].get_text(strip=True)
-                                try:
-                                    value = int(value_text.replace(' ', '').replace(',', ''))
-                                except:
-                                    value = value_text
-                                
-                                leaderboard_data.append({
-                                    'position': position,
-                                    'nickname': nickname,
-                                    'rank': rank,
-                                    'value': value
-                                })
-                        
-                        except Exception as e:
-                            logger.debug(f"Error parsing leaderboard row: {e}")
-                            continue
+            # Categories with their own section on the page are found by their header,
+            # everything else uses the first leaderboard table
+            leaderboard_data = None
+            section_pattern = _LEADERBOARD_SECTIONS.get(category)
+            if section_pattern:
+                section_header = soup.find(string=section_pattern)
+                if section_header:
+                    section_table = section_header.find_parent().find_next('table')
+                    if section_table:
+                        leaderboard_data = self._parse_leaderboard_table(section_table)
             
-            # Filter by category if needed
-            if category == 'crystals':
-                # Try to find the crystals section specifically
-                crystal_section = soup.find(text=re.compile(r'кристалл'))
-                if crystal_section:
-                    # Find the table after the crystals header
-                    crystal_table = crystal_section.find_parent().find_next('table')
-                    if crystal_table:
-                        leaderboard_data = []  # Reset and use crystal-specific data
-                        rows = crystal_table.find_all('tr')
-                        for row in rows:
-                            cells = row.find_all('td')
-                            if len(cells) >= 3:
-                                try:
-                                    position = cells[0].get_text(strip=True)
-                                    player_cell = cells[1]
-                                    player_link = player_cell.find('a')
-                                    if player_link:
-                                        nickname = player_link.get_text(strip=True)
-                                        rank_img = player_cell.find('img')
-                                        rank = 'Unknown'
-                                        if rank_img and 'src' in rank_img.attrs:
-                                            rank = self._extract_rank_from_image(rank_img['src'])
-                                        
-                                        value_text = cells[2].get_text(strip=True)
-                                        try:
-                                            value = int(value_text.replace(' ', '').replace(',', ''))
-                                        except:
-                                            value = value_text
-                                        
-                                        leaderboard_data.append({
-                                            'position': position,
-                                            'nickname': nickname,
-                                            'rank': rank,
-                                            'value': value
-                                        })
-                                except:
-                                    continue
+            if leaderboard_data is None:
+                leaderboard_data = []
+                for table in soup.find_all('table'):
+                    leaderboard_data = self._parse_leaderboard_table(table)
+                    if leaderboard_data:
+                        break
             
             return leaderboard_data[:100]  # Return top 100
             
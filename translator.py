@@ -1,67 +1,118 @@
-from deep_translator import GoogleTranslator
+import aiohttp
 import logging
 from typing import Dict, Optional
 import asyncio
-import functools
+from collections import OrderedDict
 
 logger = logging.getLogger(__name__)
 
+# Pre-defined translations for RTanks terms, keyed by lowercase Russian text
+_RANK_TRANSLATIONS = {
+    'новобранец': 'recruit',
+    'рядовой': 'private',
+    'рядовой первого класса': 'private first class',
+    'младший капрал': 'lance corporal',
+    'капрал': 'corporal',
+    'сержант': 'sergeant',
+    'штаб-сержант': 'staff sergeant',
+    'старший сержант': 'sergeant first class',
+    'мастер-сержант': 'master sergeant',
+    'уорэнт-офицер 1': 'warrant officer 1',
+    'уорэнт-офицер 2': 'warrant officer 2',
+    'уорэнт-офицер 3': 'warrant officer 3',
+    'уорэнт-офицер 4': 'warrant officer 4',
+    'уорэнт-офицер 5': 'warrant officer 5',
+    'второй лейтенант': 'second lieutenant',
+    'первый лейтенант': 'first lieutenant',
+    'капитан': 'captain',
+    'майор': 'major',
+    'подполковник': 'lieutenant colonel',
+    'полковник': 'colonel',
+    'бригадный генерал': 'brigadier general',
+    'генерал-майор': 'major general',
+    'генерал-лейтенант': 'lieutenant general',
+    'генерал': 'general',
+    'маршал': 'marshal',
+    'фельдмаршал': 'field marshal',
+    'генералиссимус': 'generalissimo',
+    'легенда': 'legend'
+}
+
+_COMMON_TRANSLATIONS = {
+    'уничтожил': 'destroyed',
+    'подбит': 'destroyed',
+    'группа': 'group',
+    'игрок': 'player',
+    'премиум': 'premium',
+    'да': 'yes',
+    'нет': 'no',
+    'поймано золотых ящиков': 'gold boxes caught',
+    'опыт': 'experience',
+    'кристаллы': 'crystals',
+    'эффективность': 'efficiency',
+    'рейтинг': 'rating',
+    'место': 'rank',
+    'киллы': 'kills',
+    'смерти': 'deaths',
+    'установленный': 'equipped',
+    'стоимость': 'cost',
+    'по опыту': 'by experience',
+    'по киллам': 'by kills',
+    'по эффективности': 'by efficiency',
+    'у/п': 'k/d',
+    'кристалл': 'crystal'
+}
+
+_WEAPON_TRANSLATIONS = {
+    'смоки': 'smoky',
+    'рикошет': 'ricochet', 
+    'молот': 'hammer',
+    'гром': 'thunder',
+    'шафт': 'shaft',
+    'твинс': 'twins',
+    'фриз': 'freeze',
+    'изида': 'isida'
+}
+
+_HULL_TRANSLATIONS = {
+    'хантер': 'hunter',
+    'васп': 'wasp',
+    'викинг': 'viking',
+    'диктатор': 'dictator',
+    'хорнет': 'hornet'
+}
+
+# Every known term in one table, so site text rarely needs an online translation.
+# Ranks, weapons and hulls are names, so they are title-cased like translate_rank does.
+_STATIC_TRANSLATIONS = {
+    **_COMMON_TRANSLATIONS,
+    **{k: v.title() for k, v in _WEAPON_TRANSLATIONS.items()},
+    **{k: v.title() for k, v in _HULL_TRANSLATIONS.items()},
+    **{k: v.title() for k, v in _RANK_TRANSLATIONS.items()},
+}
+
+# Google Translate's public endpoint, used for text the static tables don't cover
+_TRANSLATE_URL = 'https://translate.googleapis.com/translate_a/single'
+
+# Field names that appear as keys in scraped equipment data
+_EQUIPMENT_KEYS = ('установленный', 'стоимость', 'опыт', 'эффективность', 'рейтинг', 'место')
+
+# Most translated strings kept in memory; older ones are evicted first
+_CACHE_SIZE = 4096
+
 class RTanksTranslator:
     """Translator for RTanks Online Russian content to English"""
     
     def __init__(self):
-        self.translator = GoogleTranslator(source='auto', target='en')
-        self.cache = {}
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.cache: OrderedDict[str, str] = OrderedDict()
         
         # Pre-defined translations for common terms
-        self.rank_translations = {
-            'новобранец': 'recruit',
-            'рядовой': 'private',
-            'рядовой первого класса': 'private first class',
-            'младший капрал': 'lance corporal',
-            'капрал': 'corporal',
-            'сержант': 'sergeant',
-            'штаб-сержант': 'staff sergeant',
-            'старший сержант': 'sergeant first class',
-            'мастер-сержант': 'master sergeant',
-            'уорэнт-офицер 1': 'warrant officer 1',
-            'уорэнт-офицер 2': 'warrant officer 2',
-            'уорэнт-офицер 3': 'warrant officer 3',
-            'уорэнт-офицер 4': 'warrant officer 4',
-            'уорэнт-офицер 5': 'warrant officer 5',
-            'второй лейтенант': 'second lieutenant',
-            'первый лейтенант': 'first lieutenant',
-            'капитан': 'captain',
-            'майор': 'major',
-            'подполковник': 'lieutenant colonel',
-            'полковник': 'colonel',
-            'бригадный генерал': 'brigadier general',
-            'генерал-майор': 'major general',
-            'генерал-лейтенант': 'lieutenant general',
-            'генерал': 'general',
-            'генералиссимус': 'generalissimo',
-            'легенда': 'legend'
-        }
+        self.rank_translations = _RANK_TRANSLATIONS
+        self.common_translations = _COMMON_TRANSLATIONS
         
-        self.common_translations = {
-            'уничтожил': 'destroyed',
-            'подбит': 'destroyed',
-            'группа': 'group',
-            'игрок': 'player',
-            'премиум': 'premium',
-            'да': 'yes',
-            'нет': 'no',
-            'поймано золотых ящиков': 'gold boxes caught',
-            'опыт': 'experience',
-            'кристаллы': 'crystals',
-            'эффективность': 'efficiency',
-            'рейтинг': 'rating',
-            'место': 'rank',
-            'киллы': 'kills',
-            'смерти': 'deaths',
-            'установленный': 'equipped',
-            'стоимость': 'cost'
-        }
+        # Equipment keys come from a small fixed set, so translate them once up front
+        self._equip_key_cache = {key: self.translate_cached(key) for key in _EQUIPMENT_KEYS}
     
     def translate_rank(self, rank_text: str) -> str:
         if not rank_text:
@@ -72,83 +123,100 @@ class RTanksTranslator:
         if normalized in self.rank_translations:
             return self.rank_translations[normalized].title()
         
-        if all(ord(char) < 128 for char in rank_text):
+        if rank_text.isascii():
             return rank_text.title()
         
-        try:
-            translated = self._translate_text_sync(rank_text)
-            return translated.title() if translated else rank_text
-        except Exception as e:
-            logger.warning(f"Failed to translate rank '{rank_text}': {e}")
-            return rank_text
+        # Unknown ranks are only translated if translate_text_async has already fetched them
+        translated = self.translate_cached(rank_text)
+        return translated.title() if translated != rank_text else rank_text
     
-    def translate_text(self, text: str) -> str:
+    def translate_cached(self, text: str) -> str:
+        """Translate text without blocking, using only translations already known or cached"""
         if not text:
             return ''
         
-        if text in self.cache:
-            return self.cache[text]
+        translated = self._translate_local(text)
+        return translated if translated is not None else text
+    
+    async def translate_text_async(self, text: str) -> str:
+        """Translate text, falling back to Google Translate for anything not known locally"""
+        if not text:
+            return ''
         
-        if all(ord(char) < 128 for char in text if char.isalpha()):
-            self.cache[text] = text
-            return text
+        translated = self._translate_local(text)
+        if translated is not None:
+            return translated
+        
+        translated = await self._translate_remote(text)
+        if translated:
+            return self._remember(text, translated)
+        
+        return text
+    
+    def _translate_local(self, text: str) -> Optional[str]:
+        """Translate from the cache or static tables, or None if an online lookup is needed"""
+        cached = self.cache.get(text)
+        if cached is not None:
+            self.cache.move_to_end(text)
+            return cached
         
         normalized = text.lower().strip()
-        if normalized in self.common_translations:
-            result = self.common_translations[normalized]
-            self.cache[text] = result
-            return result
+        if normalized in _STATIC_TRANSLATIONS:
+            return self._remember(text, _STATIC_TRANSLATIONS[normalized])
         
-        try:
-            translated = self._translate_text_sync(text)
-            if translated:
-                self.cache[text] = translated
-                return translated
-        except Exception as e:
-            logger.warning(f"Failed to translate text '{text}': {e}")
+        # isascii() settles the common case in C; only mixed text needs the per-letter scan
+        if text.isascii() or all(ord(char) < 128 for char in text if char.isalpha()):
+            return self._remember(text, text)
         
-        return text
+        return None
     
-    def _translate_text_sync(self, text: str) -> Optional[str]:
+    def _remember(self, text: str, translated: str) -> str:
+        """Store a translation in the bounded LRU cache and return it"""
+        self.cache[text] = translated
+        if len(self.cache) > _CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return translated
+    
+    async def _get_session(self):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+        return self.session
+    
+    async def _translate_remote(self, text: str) -> Optional[str]:
+        params = {'client': 'gtx', 'sl': 'auto', 'tl': 'en', 'dt': 't', 'q': text}
         try:
-            return self.translator.translate(text)
+            session = await self._get_session()
+            async with session.get(_TRANSLATE_URL, params=params) as response:
+                if response.status != 200:
+                    logger.error(f"HTTP {response.status} from translation service")
+                    return None
+                data = await response.json(content_type=None)
+            # Reply is [[[translated, original, ...], ...], ...], one entry per sentence
+            return ''.join(segment[0] for segment in data[0] if segment[0]) or None
         except Exception as e:
             logger.error(f"Translation error: {e}")
             return None
     
-    async def translate_text_async(self, text: str) -> str:
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, functools.partial(self.translate_text, text))
+    async def close(self):
+        """Close the aiohttp session"""
+        if self.session and not self.session.closed:
+            await self.session.close()
     
-    def translate_equipment(self, equipment_data: Dict) -> Dict:
-        translated = {}
-        for key, value in equipment_data.items():
-            translated_key = self.translate_text(key)
-            translated_value = self.translate_text(value) if isinstance(value, str) else value
-            translated[translated_key] = translated_value
-        return translated
+    async def translate_equipment(self, equipment_data: Dict) -> Dict:
+        items = await asyncio.gather(
+            *(self._translate_equipment_item(key, value) for key, value in equipment_data.items())
+        )
+        return dict(items)
+    
+    async def _translate_equipment_item(self, key: str, value):
+        translated_key = self._equip_key_cache.get(key) or await self.translate_text_async(key)
+        translated_value = await self.translate_text_async(value) if isinstance(value, str) else value
+        return translated_key, translated_value
     
     def get_weapon_translation(self, weapon_name: str) -> str:
-        weapon_translations = {
-            'смоки': 'smoky',
-            'рикошет': 'ricochet', 
-            'молот': 'hammer',
-            'гром': 'thunder',
-            'шафт': 'shaft',
-            'твинс': 'twins',
-            'фриз': 'freeze',
-            'изида': 'isida'
-        }
         normalized = weapon_name.lower().strip()
-        return weapon_translations.get(normalized, weapon_name).title()
+        return _WEAPON_TRANSLATIONS.get(normalized, weapon_name).title()
     
     def get_hull_translation(self, hull_name: str) -> str:
-        hull_translations = {
-            'хантер': 'hunter',
-            'васп': 'wasp',
-            'викинг': 'viking',
-            'диктатор': 'dictator',
-            'хорнет': 'hornet'
-        }
         normalized = hull_name.lower().strip()
-        return hull_translations.get(normalized, hull_name).title()
+        return _HULL_TRANSLATIONS.get(normalized, hull_name).title()